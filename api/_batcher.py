@@ -0,0 +1,52 @@
+# api/_batcher.py
+import array
+import asyncio
+
+import pyproj
+
+
+class TransformBatcher:
+    """
+    동시에 들어온 단일 좌표 변환 요청들을 짧은 시간(window) 동안 모아서
+    transform 한 번으로 처리하고, 결과를 각 요청에 다시 나눠줍니다.
+    대기 중인 다른 요청이 없으면 기다리지 않고 바로 처리합니다.
+    """
+
+    def __init__(self, transformer: pyproj.Transformer, window: float = 0.002):
+        self._transformer = transformer
+        self._window = window
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    async def transform(self, x: float, y: float) -> tuple[float, float]:
+        fut = asyncio.get_running_loop().create_future()
+        await self._queue.put((x, y, fut))
+        return await fut
+
+    async def run(self):
+        while True:
+            items = [await self._queue.get()]
+            # 이미 스케줄된 요청들이 큐에 들어올 수 있도록 한 번만 양보합니다.
+            # 그래도 큐가 비어 있으면 기다리지 않고 바로 변환하고,
+            # 동시에 들어온 요청이 있을 때만 window 만큼 더 모읍니다.
+            await asyncio.sleep(0)
+            if not self._queue.empty():
+                await asyncio.sleep(self._window)
+            while not self._queue.empty():
+                items.append(self._queue.get_nowait())
+
+            # double 버퍼에 담아 inplace로 변환하면 pyproj가 입력 형식 판별과
+            # 결과 리스트 생성을 건너뛰고 버퍼를 그대로 덮어씁니다.
+            xs = array.array("d", [x for x, _, _ in items])
+            ys = array.array("d", [y for _, y, _ in items])
+            try:
+                self._transformer.transform(xs, ys, inplace=True)
+            except Exception as exc:
+                for _, _, fut in items:
+                    if not fut.done():
+                        fut.set_exception(exc)
+                continue
+
+            for (_, _, fut), a, b in zip(items, xs, ys):
+                # 클라이언트가 연결을 끊어 취소된 요청은 건너뜁니다.
+                if not fut.done():
+                    fut.set_result((a, b))
@@ -0,0 +1,15 @@
+# api/_responses.py
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    표준 json 대신 orjson(네이티브 구현)으로 직렬화하는 JSON 응답입니다.
+    FastAPI 내장 ORJSONResponse는 최신 버전에서 deprecated 되어 직접 정의합니다.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
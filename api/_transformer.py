@@ -0,0 +1,18 @@
+# api/_transformer.py
+from functools import lru_cache
+
+import pyproj
+
+# 좌표계 정의
+WGS84 = "+proj=latlong +datum=WGS84 +ellps=WGS84"
+KATEC = "+proj=tmerc +lat_0=38N +lon_0=128E +ellps=bessel +x_0=400000 +y_0=600000 +k=0.9999 +units=m +towgs84=-115.80,474.99,674.11,1.16,-2.31,-1.63,6.43"
+
+
+# Transformer.from_crs 는 호출마다 PROJ 데이터베이스를 조회하므로 느리고(~100ms) 메모리도 많이 씁니다.
+# 같은 좌표계 쌍은 한 번만 만들고 캐시된 객체를 재사용합니다.
+@lru_cache(maxsize=256)
+def get_transformer(src: str, dst: str, always_xy: bool = True) -> pyproj.Transformer:
+    """
+    src 좌표계에서 dst 좌표계로 변환하는 Transformer를 반환합니다. (캐시됨)
+    """
+    return pyproj.Transformer.from_crs(src, dst, always_xy=always_xy)
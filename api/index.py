@@ -1,11 +1,70 @@
 # api/index.py
-from fastapi import FastAPI, HTTPException
+import asyncio
+import math
+import os
+from contextlib import asynccontextmanager
+from typing import Literal
+from cachetools import LRUCache, TTLCache
+from fastapi import FastAPI, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-import pyproj
 import httpx
+from lxml import etree
+import numpy as np
+import orjson
+from pydantic import BaseModel, Field
+
+from api._batcher import TransformBatcher
+from api._responses import ORJSONResponse
+from api._transformer import KATEC, WGS84, get_transformer
+
+# Opinet 호출용 httpx 클라이언트를 하나만 만들어 재사용합니다.
+# 요청마다 클라이언트를 새로 만들면 매번 TCP/TLS 핸드셰이크를 다시 하게 됩니다.
+# HTTP/2를 켜면 동시에 들어온 Opinet 요청들이 연결 하나에 다중화됩니다. (서버가 지원하지 않으면 HTTP/1.1 사용)
+def new_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=True,
+        # 느린 upstream 때문에 연결이 풀에 오래 묶이지 않도록 단계별로 짧게 제한합니다.
+        timeout=httpx.Timeout(connect=2.0, read=5.0, write=2.0, pool=1.0),
+        limits=httpx.Limits(max_keepalive_connections=50, max_connections=100),
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    공용 httpx 클라이언트를 반환합니다. 처음 쓰일 때 만듭니다.
+    lifespan이 실행되지 않는 환경(일부 서버리스 런타임, with 없는 TestClient 등)에서도 동작하도록
+    lifespan에서 미리 만들지 않고, 이벤트 루프가 바뀌면 그 루프용 클라이언트를 새로 만듭니다.
+    """
+    loop = asyncio.get_running_loop()
+    client = getattr(app.state, "http", None)
+    if client is None or client.is_closed or getattr(app.state, "http_loop", None) is not loop:
+        client = app.state.http = new_http_client()
+        app.state.http_loop = loop
+    return client
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 단일 좌표 변환 요청을 모아서 처리하는 배처를 방향별로 하나씩 띄웁니다.
+    app.state.to_wgs84 = TransformBatcher(get_transformer(KATEC, WGS84))
+    app.state.to_katec = TransformBatcher(get_transformer(WGS84, KATEC))
+    tasks = [
+        asyncio.create_task(app.state.to_wgs84.run()),
+        asyncio.create_task(app.state.to_katec.run()),
+    ]
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        # 클라이언트는 처음 쓰일 때 만들어지므로, 만들어진 경우에만 닫습니다.
+        client = getattr(app.state, "http", None)
+        if client is not None:
+            await client.aclose()
 
 # FastAPI 앱 생성
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
 # apikey = 
 
 # 이 부분이 CORS 에러를 해결합니다.
@@ -27,237 +86,320 @@ app.add_middleware(
 )
 # --- CORS 설정 끝 ---
 
-# 좌표계 정의
-WGS84 = "+proj=latlong +datum=WGS84 +ellps=WGS84"
-KATEC = "+proj=tmerc +lat_0=38N +lon_0=128E +ellps=bessel +x_0=400000 +y_0=600000 +k=0.9999 +units=m +towgs84=-115.80,474.99,674.11,1.16,-2.31,-1.63,6.43"
-# CRS 객체 생성
-KATEC_proj = pyproj.CRS(KATEC)
-WGS84_proj = pyproj.CRS(WGS84)
+# 변환기는 get_transformer 가 좌표계 쌍별로 캐시합니다.
+# 첫 요청이 느려지지 않도록 임포트 시점에 미리 만들어 둡니다.
+get_transformer(KATEC, WGS84)  # 1. KATEC -> WGS84 (순방향)
+get_transformer(WGS84, KATEC)  # 2. WGS84 -> KATEC (역방향)
 
-# 1. 변환기: KATEC -> WGS84 (순방향)
-transformer_to_wgs84 = pyproj.Transformer.from_crs(KATEC_proj, WGS84_proj, always_xy=True)
 
-# 2. 변환기: WGS84 -> KATEC (역방향)
-transformer_to_katec = pyproj.Transformer.from_crs(WGS84_proj, KATEC_proj, always_xy=True)
+# --- API 엔드포인트 정의 ---
 
+# 루트 응답은 항상 같으므로 임포트 시점에 한 번만 JSON으로 인코딩해 둡니다.
+_ROOT_BYTES = orjson.dumps({
+    "message": "Coordinate Conversion API",
+    "note": "api_key is optional; the server's OPINET_API_KEY is used when omitted.",
+    "endpoints": [
+        "/katec-to-wgs84?x={x_coord}&y={y_coord}",
+        "/wgs84-to-katec?lon={longitude}&lat={latitude}",
+        "POST /katec-to-wgs84/batch {xs: [...], ys: [...]}",
+        "POST /wgs84-to-katec/batch {lons: [...], lats: [...]}",
+        "/api/nearby-gas-stations?x={katec_x}&y={katec_y}&radius={meters}&prodcd={product_code}&format={xml|json}[&api_key={api_key}]",
+        "/api/detail-by-id?uid={station_id}[&api_key={api_key}]",
+        "/api/avg-sido-price[?api_key={api_key}]",
+        "/api/low-top-10?prodcd={product_code}&area={area_code}&cnt={count}[&api_key={api_key}]",
+        "/api/avg-all-price[?api_key={api_key}]",
+        "/api/avg-recent-price[?api_key={api_key}]",
+        "/api/avg-sigun-price?sido={sido}&sigun={sigun}[&api_key={api_key}]",
+        "/api/area-avg-recent-price?area={area}[&api_key={api_key}]",
+    ]
+})
 
-# --- API 엔드포인트 정의 ---
 
 @app.get("/")
-def read_root():
-    return {
-        "message": "Coordinate Conversion API",
-        "endpoints": [
-            "/katec-to-wgs84?x={x_coord}&y={y_coord}",
-            "/wgs84-to-katec?lon={longitude}&lat={latitude}",
-            "/api/nearby-gas-stations?key={api_key}&x={katec_x}&y={katec_y}&radius={meters}&prodcd={product_code}",
-            "/api/detail-by-id?key={api_key}&uid={station_id}",
-            "/api/avg-sido-price?key={api_key}",
-            "/api/low-top-10?key={api_key}&prodcd={product_code}&area={area_code}&cnt={count}"
-            "/api/avg-all-price?key={api_key}",
-            "/api/avg-recent-price?key={api_key}",
-            "/api/avg-sido-price?key={api_key}&area={area}",
-            "/api/avg-sigun-price?key={api_key}&sido={sido}&sigun={sigun}"
-            "/api/area-avg-recent-price?key={api_key}&area={area}",
-        ]
-    }
-  
+async def read_root():
+    return Response(content=_ROOT_BYTES, media_type="application/json")
+
+
+# 지도 마커처럼 같은 좌표가 반복해서 변환되므로 결과를 캐시합니다.
+# 좌표는 약 10cm 단위로 반올림해서 키로 씁니다. (KATEC: 소수 1자리 m, WGS84: 소수 6자리 도)
+_to_wgs84_cache: LRUCache = LRUCache(maxsize=4096)
+_to_katec_cache: LRUCache = LRUCache(maxsize=4096)
+
+
+def json_bytes_response(content: bytes) -> Response:
+    # 응답 객체는 미들웨어가 헤더를 고칠 수 있으므로 캐시하지 않고 요청마다 새로 만듭니다.
+    return Response(content=content, media_type="application/json")
+
+
+async def transform_point(batcher_name: str, src: str, dst: str, a: float, b: float) -> tuple[float, float]:
+    """
+    lifespan에서 띄운 배처로 좌표 하나를 변환합니다.
+    lifespan이 실행되지 않은 환경(일부 서버리스 런타임, with 없는 TestClient 등)에서는
+    배처가 없으므로 변환기를 직접 호출합니다.
+    """
+    batcher = getattr(app.state, batcher_name, None)
+    if batcher is None:
+        return get_transformer(src, dst).transform(a, b)
+    return await batcher.transform(a, b)
+
+
+# 쿼리 값의 범위를 선언해 잘못된 값은 변환 전에 422로 걸러냅니다.
+# 결과는 orjson으로 직접 인코딩한 바이트를 캐시하고 Response로 돌려주므로,
+# 캐시 적중 시에는 FastAPI의 jsonable_encoder/직렬화 단계를 모두 건너뜁니다.
+# KATEC 좌표는 한반도 영역(0 ~ KATEC_MAX m)만 받고, WGS84 -> KATEC 변환 결과도 이 범위를 벗어나면 거절합니다.
+KATEC_MAX = 1_000_000
+
+
+def in_katec_range(x: float, y: float) -> bool:
+    # NaN/inf 는 비교가 모두 거짓이거나 범위를 넘으므로 여기서 함께 걸러집니다.
+    return 0 <= x <= KATEC_MAX and 0 <= y <= KATEC_MAX
+
 
 @app.get("/katec-to-wgs84")
-def convert_katec_to_wgs84(x: float, y: float):
+async def convert_katec_to_wgs84(
+    x: float = Query(..., ge=0, le=KATEC_MAX),
+    y: float = Query(..., ge=0, le=KATEC_MAX),
+):
     """
     KATEC 좌표(x, y)를 WGS84 경위도(lon, lat)로 변환합니다.
     """
-    try:
-        lon, lat = transformer_to_wgs84.transform(x, y)
-        return {"lon": lon, "lat": lat}
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    key = (round(x, 1), round(y, 1))
+    content = _to_wgs84_cache.get(key)
+    if content is not None:
+        return json_bytes_response(content)
+    # pyproj는 변환할 수 없는 좌표에 예외 대신 inf를 돌려주므로 결과 값으로 검사합니다.
+    lon, lat = await transform_point("to_wgs84", KATEC, WGS84, *key)
+    if not (math.isfinite(lon) and math.isfinite(lat)):
+        raise HTTPException(status_code=400, detail="변환할 수 없는 좌표입니다.")
+    content = _to_wgs84_cache[key] = orjson.dumps({"lon": lon, "lat": lat})
+    return json_bytes_response(content)
 
 
 @app.get("/wgs84-to-katec")
-def convert_wgs84_to_katec(lon: float, lat: float):
+async def convert_wgs84_to_katec(
+    lon: float = Query(..., ge=-180, le=180),
+    lat: float = Query(..., ge=-90, le=90),
+):
     """
     WGS84 경위도(lon, lat)를 KATEC 좌표(x, y)로 변환합니다.
     """
-    try:
-        x, y = transformer_to_katec.transform(lon, lat)
-        return {"x": x, "y": y}
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    
+    key = (round(lon, 6), round(lat, 6))
+    content = _to_katec_cache.get(key)
+    if content is not None:
+        return json_bytes_response(content)
+    x, y = await transform_point("to_katec", WGS84, KATEC, *key)
+    if not in_katec_range(x, y):
+        raise HTTPException(status_code=400, detail="KATEC 좌표 영역을 벗어난 좌표입니다.")
+    content = _to_katec_cache[key] = orjson.dumps({"x": x, "y": y})
+    return json_bytes_response(content)
+
+
+# --- 일괄 변환 엔드포인트 ---
+# 좌표 배열을 한 번의 transform 호출로 넘기면 pyproj가 C 루프에서 전부 처리하므로
+# 좌표마다 요청을 보내는 것보다 훨씬 빠릅니다.
+# 한 번에 받을 수 있는 좌표 수는 BATCH_MAX_POINTS 개로 제한하고(넘으면 422),
+# 그래도 수 ms가 걸릴 수 있으므로 이벤트 루프를 막지 않도록
+# 일부러 def로 선언해 스레드풀에서 실행되게 합니다.
+BATCH_MAX_POINTS = 10_000
+
+
+class KatecPoints(BaseModel):
+    xs: list[float] = Field(max_length=BATCH_MAX_POINTS)
+    ys: list[float] = Field(max_length=BATCH_MAX_POINTS)
+
+
+class Wgs84Points(BaseModel):
+    lons: list[float] = Field(max_length=BATCH_MAX_POINTS)
+    lats: list[float] = Field(max_length=BATCH_MAX_POINTS)
+
+
+@app.post("/katec-to-wgs84/batch")
+def convert_katec_to_wgs84_batch(body: KatecPoints):
+    """
+    KATEC 좌표 배열(xs, ys)을 WGS84 경위도 배열(lon, lat)로 한 번에 변환합니다.
+    """
+    if len(body.xs) != len(body.ys):
+        raise HTTPException(status_code=400, detail="xs와 ys의 길이가 같아야 합니다.")
+    ax = np.asarray(body.xs, dtype="f8")
+    ay = np.asarray(body.ys, dtype="f8")
+    if not (((ax >= 0) & (ax <= KATEC_MAX)).all() and ((ay >= 0) & (ay <= KATEC_MAX)).all()):
+        raise HTTPException(status_code=400, detail="KATEC 좌표 영역을 벗어난 좌표가 포함되어 있습니다.")
+    lon, lat = get_transformer(KATEC, WGS84).transform(ax, ay)
+    # 단일 변환과 마찬가지로 pyproj가 inf를 돌려준 좌표가 있으면 400으로 거절합니다.
+    if not (np.isfinite(lon).all() and np.isfinite(lat).all()):
+        raise HTTPException(status_code=400, detail="변환할 수 없는 좌표가 포함되어 있습니다.")
+    return {"lon": lon.tolist(), "lat": lat.tolist()}
+
+
+@app.post("/wgs84-to-katec/batch")
+def convert_wgs84_to_katec_batch(body: Wgs84Points):
+    """
+    WGS84 경위도 배열(lons, lats)을 KATEC 좌표 배열(x, y)로 한 번에 변환합니다.
+    """
+    if len(body.lons) != len(body.lats):
+        raise HTTPException(status_code=400, detail="lons와 lats의 길이가 같아야 합니다.")
+    alon = np.asarray(body.lons, dtype="f8")
+    alat = np.asarray(body.lats, dtype="f8")
+    x, y = get_transformer(WGS84, KATEC).transform(alon, alat)
+    if not (((x >= 0) & (x <= KATEC_MAX)).all() and ((y >= 0) & (y <= KATEC_MAX)).all()):
+        raise HTTPException(status_code=400, detail="KATEC 좌표 영역을 벗어난 좌표가 포함되어 있습니다.")
+    return {"x": x.tolist(), "y": y.tolist()}
+
 # ✅ [추가] Opinet API를 위한 프록시 엔드포인트
-@app.get("/api/nearby-gas-stations")
-async def get_nearby_gas_stations(api_key: str,x: float, y: float, radius: int = 5000, prodcd: str = "B027"):
-    OPINET_API_URL = "https://www.opinet.co.kr/api/aroundAll.do"
-    # 중요: 실제 서비스에서는 API 키를 코드에 직접 넣지 않고 환경 변수로 관리하는 것이 안전합니다.
-
-    params = {
-        "code": api_key,
-        "x": x,
-        "y": y,
-        "radius": radius,
-        "prodcd": prodcd,
-        "out": "xml"
-    }
-
-    async with httpx.AsyncClient() as client:
+
+# Opinet API 주소와 모든 요청에 공통으로 들어가는 파라미터는 모듈 상수로 한 번만 만들어 둡니다.
+OPINET_API_BASE = "https://www.opinet.co.kr/api"
+AROUND_ALL_URL = f"{OPINET_API_BASE}/aroundAll.do"
+DETAIL_BY_ID_URL = f"{OPINET_API_BASE}/detailById.do"
+AVG_SIDO_PRICE_URL = f"{OPINET_API_BASE}/avgSidoPrice.do"
+AVG_SIGUN_PRICE_URL = f"{OPINET_API_BASE}/avgSigunPrice.do"
+AVG_RECENT_PRICE_URL = f"{OPINET_API_BASE}/avgRecentPrice.do"
+AVG_ALL_PRICE_URL = f"{OPINET_API_BASE}/avgAllPrice.do"
+AREA_AVG_RECENT_PRICE_URL = f"{OPINET_API_BASE}/areaAvgRecentPrice.do"
+LOW_TOP_10_URL = f"{OPINET_API_BASE}/lowTop10.do"
+
+# API 키는 코드에 넣지 않고 환경 변수(OPINET_API_KEY)로 관리합니다.
+# 요청에 api_key 가 없으면 이 값을 사용합니다.
+OPINET_API_KEY = os.environ.get("OPINET_API_KEY")
+_BASE_PARAMS = (("out", "xml"),)
+
+# 실패한 요청은 OPINET_RETRY_DELAY 초부터 두 배씩 늘려 가며 OPINET_RETRIES 번 재시도합니다.
+OPINET_RETRIES = 1
+OPINET_RETRY_DELAY = 0.25
+
+
+def resolve_api_key(api_key: str | None) -> str:
+    """
+    요청에 담긴 api_key 를, 없으면 환경 변수의 키를 반환합니다.
+    """
+    key = api_key or OPINET_API_KEY
+    if not key:
+        raise HTTPException(status_code=400, detail="Opinet API 키가 필요합니다. (api_key 또는 OPINET_API_KEY)")
+    return key
+
+
+async def fetch_opinet(url: str, api_key: str, params: tuple = ()) -> httpx.Response:
+    """
+    공용 httpx 클라이언트로 Opinet API를 호출하고, 실패하면 HTTPException으로 바꿔 올립니다.
+    타임아웃이나 연결 오류는 250ms 뒤에 한 번 더 시도합니다.
+    """
+    params = (("code", api_key), *_BASE_PARAMS, *params)
+    for attempt in range(OPINET_RETRIES + 1):
         try:
-            response = await client.get(OPINET_API_URL, params=params)
+            response = await get_http_client().get(url, params=params)
             response.raise_for_status() # HTTP 에러 발생 시 예외 처리
-            # Opinet이 XML을 반환하므로, 그대로 클라이언트에 전달합니다.
-            # 하지만 FastAPI는 기본적으로 JSON을 반환하므로, XML을 텍스트로 감싸서 JSON으로 보냅니다.
-            return {"xml_data": response.text}
+            return response
         except httpx.RequestError as exc:
+            if attempt < OPINET_RETRIES:
+                await asyncio.sleep(OPINET_RETRY_DELAY * 2 ** attempt)
+                continue
+            if isinstance(exc, httpx.TimeoutException):
+                raise HTTPException(status_code=504, detail="Opinet API 응답 시간 초과")
             raise HTTPException(status_code=400, detail=f"Opinet API 요청 실패: {exc}")
         except httpx.HTTPStatusError as exc:
             raise HTTPException(status_code=exc.response.status_code, detail=f"Opinet API 에러: {exc.response.text}")
 
-@app.get("/api/detail-by-id")
-async def detail_by_id(api_key: str,uid: str):
-    OPINET_API_URL = "https://www.opinet.co.kr/api/detailById.do"
-    # 중요: 실제 서비스에서는 API 키를 코드에 직접 넣지 않고 환경 변수로 관리하는 것이 안전합니다.
 
-    params = {
-        "code": api_key,
-        "id": uid,
-        "out": "xml"
-    }
+def xml_response(response: httpx.Response) -> Response:
+    """
+    Opinet이 돌려준 XML 바이트를 디코딩/JSON 변환 없이 그대로 클라이언트에 전달합니다.
+    """
+    return Response(
+        content=response.content,
+        media_type=response.headers.get("content-type", "application/xml"),
+    )
+
+
+def parse_stations(content: bytes) -> list[dict]:
+    """
+    aroundAll.do XML 응답의 <OIL> 항목들을 {태그: 값} 딕셔너리 리스트로 변환합니다.
+    """
+    root = etree.fromstring(content)
+    # 주석/처리 명령 노드는 tag가 문자열이 아니므로 요소 자식만 순회합니다.
+    return [
+        {el.tag: el.text for el in oil.iterchildren(tag=etree.Element)}
+        for oil in root.iterfind(".//OIL")
+    ]
+
+
+# 지도를 조금씩 움직일 때마다 거의 같은 좌표로 aroundAll.do 를 다시 부르게 되므로,
+# 좌표를 10m 단위로 반올림한 키로 응답을 1분간 캐시합니다.
+_stations_cache: TTLCache = TTLCache(maxsize=1024, ttl=60)
+# 캐시에 없는 같은 키의 요청이 동시에 여러 개 들어오면 upstream 호출은 하나만 보내고
+# 나머지는 그 결과를 함께 기다립니다.
+_stations_inflight: dict[tuple, asyncio.Task] = {}
 
-    async with httpx.AsyncClient() as client:
+
+async def _fetch_stations(cache_key: tuple, api_key: str, params: tuple) -> httpx.Response:
+    response = await fetch_opinet(AROUND_ALL_URL, api_key, params)
+    _stations_cache[cache_key] = response
+    return response
+
+
+async def get_stations(cache_key: tuple, api_key: str, params: tuple) -> httpx.Response:
+    """
+    aroundAll.do 응답을 캐시에서 꺼내거나, 진행 중인 같은 요청에 합류하거나, 새로 호출합니다.
+    """
+    response = _stations_cache.get(cache_key)
+    if response is not None:
+        return response
+    task = _stations_inflight.get(cache_key)
+    if task is None:
+        task = asyncio.create_task(_fetch_stations(cache_key, api_key, params))
+        _stations_inflight[cache_key] = task
+        task.add_done_callback(lambda _: _stations_inflight.pop(cache_key, None))
+    # 먼저 요청한 클라이언트가 연결을 끊어도 다른 대기자들의 호출은 취소되지 않도록 shield 합니다.
+    return await asyncio.shield(task)
+
+
+@app.get("/api/nearby-gas-stations")
+async def get_nearby_gas_stations(x: float, y: float, radius: int = 5000, prodcd: str = "B027", format: Literal["xml", "json"] = "xml", api_key: str | None = None):
+    api_key = resolve_api_key(api_key)
+
+    cache_key = (api_key, round(x, -1), round(y, -1), radius, prodcd)
+    params = (("x", x), ("y", y), ("radius", radius), ("prodcd", prodcd))
+    response = await get_stations(cache_key, api_key, params)
+    if format == "json":
+        # XML 파싱은 CPU 작업이므로 이벤트 루프를 막지 않도록 스레드풀에서 처리합니다.
         try:
-            response = await client.get(OPINET_API_URL, params=params)
-            response.raise_for_status() # HTTP 에러 발생 시 예외 처리
-            # Opinet이 XML을 반환하므로, 그대로 클라이언트에 전달합니다.
-            # 하지만 FastAPI는 기본적으로 JSON을 반환하므로, XML을 텍스트로 감싸서 JSON으로 보냅니다.
-            return {"xml_data": response.text}
-        except httpx.RequestError as exc:
-            raise HTTPException(status_code=400, detail=f"Opinet API 요청 실패: {exc}")
-        except httpx.HTTPStatusError as exc:
-            raise HTTPException(status_code=exc.response.status_code, detail=f"Opinet API 에러: {exc.response.text}")
-        
+            return await run_in_threadpool(parse_stations, response.content)
+        except etree.XMLSyntaxError as exc:
+            raise HTTPException(status_code=502, detail=f"Opinet 응답 파싱 실패: {exc}")
+    return xml_response(response)
+
+@app.get("/api/detail-by-id")
+async def detail_by_id(uid: str, api_key: str | None = None):
+    response = await fetch_opinet(DETAIL_BY_ID_URL, resolve_api_key(api_key), (("id", uid),))
+    return xml_response(response)
+
 @app.get("/api/avg-sido-price")
-async def avg_sido_price(api_key: str):
-    OPINET_API_URL = "https://www.opinet.co.kr/api/avgSidoPrice.do"
-
-    params = {
-        "code": api_key,
-        "out": "xml"
-    }
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(OPINET_API_URL, params=params)
-            response.raise_for_status() # HTTP 에러 발생 시 예외 처리
-            # Opinet이 XML을 반환하므로, 그대로 클라이언트에 전달합니다.
-            # 하지만 FastAPI는 기본적으로 JSON을 반환하므로, XML을 텍스트로 감싸서 JSON으로 보냅니다.
-            return {"xml_data": response.text}
-        except httpx.RequestError as exc:
-            raise HTTPException(status_code=400, detail=f"Opinet API 요청 실패: {exc}")
-        except httpx.HTTPStatusError as exc:
-            raise HTTPException(status_code=exc.response.status_code, detail=f"Opinet API 에러: {exc.response.text}")
+async def avg_sido_price(api_key: str | None = None):
+    response = await fetch_opinet(AVG_SIDO_PRICE_URL, resolve_api_key(api_key))
+    return xml_response(response)
 
 @app.get("/api/avg-sigun-price")
-async def avg_sido_price(api_key: str, sido: str, sigun: str):
-    OPINET_API_URL = "https://www.opinet.co.kr/api/avgSigunPrice.do"
-
-    params = {
-        "code": api_key,
-        "sido": sido,
-        "sigun": sigun,
-        "out": "xml"
-    }
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(OPINET_API_URL, params=params)
-            response.raise_for_status() # HTTP 에러 발생 시 예외 처리
-            # Opinet이 XML을 반환하므로, 그대로 클라이언트에 전달합니다.
-            # 하지만 FastAPI는 기본적으로 JSON을 반환하므로, XML을 텍스트로 감싸서 JSON으로 보냅니다.
-            return {"xml_data": response.text}
-        except httpx.RequestError as exc:
-            raise HTTPException(status_code=400, detail=f"Opinet API 요청 실패: {exc}")
-        except httpx.HTTPStatusError as exc:
-            raise HTTPException(status_code=exc.response.status_code, detail=f"Opinet API 에러: {exc.response.text}")
-        
+async def avg_sigun_price(sido: str, sigun: str, api_key: str | None = None):
+    params = (("sido", sido), ("sigun", sigun))
+    response = await fetch_opinet(AVG_SIGUN_PRICE_URL, resolve_api_key(api_key), params)
+    return xml_response(response)
+
 @app.get("/api/avg-recent-price")
-async def avg_recent_price(api_key: str):
-    OPINET_API_URL = "https://www.opinet.co.kr/api/avgRecentPrice.do"
-
-    params = {
-        "code": api_key,
-        "out": "xml"
-    }
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(OPINET_API_URL, params=params)
-            response.raise_for_status() # HTTP 에러 발생 시 예외 처리
-            # Opinet이 XML을 반환하므로, 그대로 클라이언트에 전달합니다.
-            # 하지만 FastAPI는 기본적으로 JSON을 반환하므로, XML을 텍스트로 감싸서 JSON으로 보냅니다.
-            return {"xml_data": response.text}
-        except httpx.RequestError as exc:
-            raise HTTPException(status_code=400, detail=f"Opinet API 요청 실패: {exc}")
-        except httpx.HTTPStatusError as exc:
-            raise HTTPException(status_code=exc.response.status_code, detail=f"Opinet API 에러: {exc.response.text}")
+async def avg_recent_price(api_key: str | None = None):
+    response = await fetch_opinet(AVG_RECENT_PRICE_URL, resolve_api_key(api_key))
+    return xml_response(response)
 
 @app.get("/api/avg-all-price")
-async def avg_all_price(api_key: str):
-    OPINET_API_URL = "https://www.opinet.co.kr/api/avgAllPrice.do"
-
-    params = {
-        "code": api_key,
-        "out": "xml"
-    }
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(OPINET_API_URL, params=params)
-            response.raise_for_status() # HTTP 에러 발생 시 예외 처리
-            # Opinet이 XML을 반환하므로, 그대로 클라이언트에 전달합니다.
-            # 하지만 FastAPI는 기본적으로 JSON을 반환하므로, XML을 텍스트로 감싸서 JSON으로 보냅니다.
-            return {"xml_data": response.text}
-        except httpx.RequestError as exc:
-            raise HTTPException(status_code=400, detail=f"Opinet API 요청 실패: {exc}")
-        except httpx.HTTPStatusError as exc:
-            raise HTTPException(status_code=exc.response.status_code, detail=f"Opinet API 에러: {exc.response.text}")
+async def avg_all_price(api_key: str | None = None):
+    response = await fetch_opinet(AVG_ALL_PRICE_URL, resolve_api_key(api_key))
+    return xml_response(response)
 
 @app.get("/api/area-avg-recent-price")
-async def avg_sido_price(api_key: str, area: str):
-    OPINET_API_URL = "https://www.opinet.co.kr/api/areaAvgRecentPrice.do"
-
-    params = {
-        "area": area,
-        "code": api_key,
-        "out": "xml"
-    }
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(OPINET_API_URL, params=params)
-            response.raise_for_status() # HTTP 에러 발생 시 예외 처리
-            # Opinet이 XML을 반환하므로, 그대로 클라이언트에 전달합니다.
-            # 하지만 FastAPI는 기본적으로 JSON을 반환하므로, XML을 텍스트로 감싸서 JSON으로 보냅니다.
-            return {"xml_data": response.text}
-        except httpx.RequestError as exc:
-            raise HTTPException(status_code=400, detail=f"Opinet API 요청 실패: {exc}")
-        except httpx.HTTPStatusError as exc:
-            raise HTTPException(status_code=exc.response.status_code, detail=f"Opinet API 에러: {exc.response.text}")
-        
+async def area_avg_recent_price(area: str, api_key: str | None = None):
+    response = await fetch_opinet(AREA_AVG_RECENT_PRICE_URL, resolve_api_key(api_key), (("area", area),))
+    return xml_response(response)
+
 @app.get("/api/low-top-10")
-async def avg_sido_price(api_key: str, prodcd: str, area: str, cnt: int):
-    OPINET_API_URL = "https://www.opinet.co.kr/api/lowTop10.do"
-
-    params = {
-        "code": api_key,
-        "out": "xml",
-        "prodcd": prodcd,
-        "area": area,
-        "cnt": cnt
-    }
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(OPINET_API_URL, params=params)
-            response.raise_for_status() # HTTP 에러 발생 시 예외 처리
-            # Opinet이 XML을 반환하므로, 그대로 클라이언트에 전달합니다.
-            # 하지만 FastAPI는 기본적으로 JSON을 반환하므로, XML을 텍스트로 감싸서 JSON으로 보냅니다.
-            return {"xml_data": response.text}
-        except httpx.RequestError as exc:
-            raise HTTPException(status_code=400, detail=f"Opinet API 요청 실패: {exc}")
-        except httpx.HTTPStatusError as exc:
-            raise HTTPException(status_code=exc.response.status_code, detail=f"Opinet API 에러: {exc.response.text}")
\ No newline at end of file
+async def low_top_10(prodcd: str, area: str, cnt: int, api_key: str | None = None):
+    params = (("prodcd", prodcd), ("area", area), ("cnt", cnt))
+    response = await fetch_opinet(LOW_TOP_10_URL, resolve_api_key(api_key), params)
+    return xml_response(response)